@@ -1,7 +1,13 @@
 import dash
+import os
 from dash import Dash, html
+from data.datamanagement import portfolio_manager
+
+# Load portfolio data once before the pages build their initial layouts
+portfolio_manager.run_sync(portfolio_manager.ready())
 
 app = Dash(__name__, use_pages=True)
+server = app.server
 
 app.layout = html.Div([
     html.H1("Multi-Asset Analysis Dashboard"),
@@ -13,4 +19,5 @@ app.layout = html.Div([
 ])
 
 if __name__ == '__main__':
-    app.run(debug=True, port = 8080)
\ No newline at end of file
+    # Development server only, production runs app:server under gunicorn (see Procfile)
+    app.run(debug=bool(os.getenv("DEV")), port = 8080)
\ No newline at end of file
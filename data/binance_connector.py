@@ -3,114 +3,382 @@ from binance import Client
 import numpy as np
 from binance.exceptions import BinanceAPIException, BinanceRequestException
 from src.logger import binance_logger
+from src import kline_cache
 import asyncio
 import aiohttp
+import time
+from requests.adapters import HTTPAdapter
+from types import MappingProxyType
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+# Read-only lookup tables, safe to share across threads
+_INTERVALS = MappingProxyType({
+    "1s": Client.KLINE_INTERVAL_1SECOND,
+    "1m": Client.KLINE_INTERVAL_1MINUTE,
+    "1d": Client.KLINE_INTERVAL_1DAY,
+    "1M": Client.KLINE_INTERVAL_1MONTH,
+    "12h": Client.KLINE_INTERVAL_12HOUR,
+    "1h": Client.KLINE_INTERVAL_1HOUR,
+})
+
+_INTERVAL_SECONDS = MappingProxyType({
+    "1s": 1,
+    "1m": 60,
+    "1d": 86400,
+    "1M": 2592000,  # 30 days
+    "12h": 43200,
+    "1h": 3600,
+})
+
+# Seconds a cached kline response stays fresh, per interval
+_CACHE_TTL = MappingProxyType({
+    "1s": 1,
+    "1m": 30,
+    "1h": 300,
+    "12h": 1800,
+    "1d": 3600,
+    "1M": 3600,
+})
+
+# Arrow-backed dtypes of the processed kline frame. Prices stay float64, float32
+# cannot hold BTC-sized prices and portfolio values to the cent
+_KLINE_DTYPES = MappingProxyType({
+    "opentime": "timestamp[ms][pyarrow]",
+    "open": "double[pyarrow]",
+    "high": "double[pyarrow]",
+    "low": "double[pyarrow]",
+    "close": "double[pyarrow]",
+    "volume": "float32[pyarrow]",
+    "closetime": "timestamp[ms][pyarrow]",
+    "quote_volume": "float32[pyarrow]",
+    "log_returns": "float32[pyarrow]",
+})
+
+_ERROR_MESSAGES = MappingProxyType({
+    -1021: "Timestamp out of sync. Check system time.",
+    -1022: "Invalid signature. Check API secret and request format.",
+    -2014: "API key format invalid.",
+    -2015: "Invalid API key, IP, or permissions.",
+    -1003: "Too many requests. Rate limit exceeded.",
+    -1013: "Invalid quantity or price filters.",
+    -2010: "Account has insufficient balance.",
+})
+
+
+def _log_returns(close: np.ndarray) -> np.ndarray:
+    """Log returns of a close price array in a single buffer, the first value is NaN"""
+    returns = np.empty_like(close)
+    returns[:1] = np.nan
+    with np.errstate(divide="ignore", invalid="ignore"):
+        np.divide(close[1:], close[:-1], out=returns[1:])
+        np.log(returns[1:], out=returns[1:])
+    return returns
+
+
 class HistoricalData:
     """Handles fetching historical data from Binance API with async support"""
     
-    intervals = {
-        "1s": Client.KLINE_INTERVAL_1SECOND,
-        "1m": Client.KLINE_INTERVAL_1MINUTE,
-        "1d": Client.KLINE_INTERVAL_1DAY,
-        "1M": Client.KLINE_INTERVAL_1MONTH,
-        "12h": Client.KLINE_INTERVAL_12HOUR,
-        "1h": Client.KLINE_INTERVAL_1HOUR,
-    }
-    
-    error_messages = {
-        -1021: "Timestamp out of sync. Check system time.",
-        -1022: "Invalid signature. Check API secret and request format.",
-        -2014: "API key format invalid.",
-        -2015: "Invalid API key, IP, or permissions.",
-        -1003: "Too many requests. Rate limit exceeded.",
-        -1013: "Invalid quantity or price filters.",
-        -2010: "Account has insufficient balance.",
-    }
-    
-    def __init__(self, api_key: str, api_secret: str) -> None:
+    klines_url = "https://api.binance.com/api/v3/klines"
+    
+    intervals = _INTERVALS
+    interval_seconds = _INTERVAL_SECONDS
+    cache_ttl = _CACHE_TTL
+    error_messages = _ERROR_MESSAGES
+    
+    def __init__(self, api_key: str, api_secret: str, disk_cache: bool = False) -> None:
         self.client = Client(api_key, api_secret)
+        self._disk_cache = disk_cache
+        # Larger keep-alive pool than requests' default of 10 for concurrent REST calls
+        self.client.session.mount(
+            "https://",
+            HTTPAdapter(pool_connections=50, pool_maxsize=50, pool_block=False),
+        )
+        self.client.session.headers["Connection"] = "keep-alive"
+        # Sessions and locks are bound to the loop they were created on, so both
+        # are kept per loop and a loop's session lives until close() is awaited on it
+        self._sessions: Dict[asyncio.AbstractEventLoop, aiohttp.ClientSession] = {}
+        self._cache: Dict[Tuple[str, str, int], Tuple[float, pd.DataFrame]] = {}
+        self._cache_locks: Dict[
+            asyncio.AbstractEventLoop, Dict[Tuple[str, str, int], asyncio.Lock]
+        ] = {}
+        # Per-symbol exponential backoff after failed requests
+        self._backoff: Dict[str, float] = {}
+        self._retry_at: Dict[str, float] = {}
         self.test_connection()
     
+    def _get_session(self) -> aiohttp.ClientSession:
+        """Get the aiohttp session of the running event loop, creating it on first use"""
+        loop = asyncio.get_running_loop()
+        session = self._sessions.get(loop)
+        if session is None or session.closed:
+            session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(
+                    limit=50, limit_per_host=20, ttl_dns_cache=300
+                )
+            )
+            self._sessions[loop] = session
+        return session
+    
+    def _get_cached(self, key: Tuple[str, str, int]) -> Optional[pd.DataFrame]:
+        """Return a shallow copy of a cached response if it is still fresh"""
+        entry = self._cache.get(key)
+        if entry is None:
+            return None
+        fetched_at, df = entry
+        if time.monotonic() - fetched_at >= _CACHE_TTL.get(key[1], 0):
+            return None
+        return df.copy(deep=False)
+    
+    def _set_cached(self, key: Tuple[str, str, int], df: pd.DataFrame) -> None:
+        """Store a response in the cache, failed (empty) fetches are not cached"""
+        if not df.empty:
+            self._cache[key] = (time.monotonic(), df)
+    
+    def _load_disk_cache(self, symbol: str, interval: str) -> Tuple[pd.DataFrame, bool]:
+        """Load klines from the disk cache, returns the frame and whether it is still fresh"""
+        if not self._disk_cache:
+            return pd.DataFrame(), False
+        
+        try:
+            cached = kline_cache.load(symbol, interval)
+        except Exception as e:
+            binance_logger.error(f"Error loading cached data for {symbol} with interval {interval}: {e}")
+            return pd.DataFrame(), False
+        
+        if not cached.empty:
+            # Files written before the price columns were widened hold float32 prices
+            cached = cached.astype(dict(_KLINE_DTYPES))
+        cache_age = kline_cache.age(symbol, interval)
+        fresh = (
+            not cached.empty
+            and cache_age is not None
+            and cache_age < _CACHE_TTL.get(interval, 0)
+        )
+        return cached, fresh
+    
+    def _store_disk_cache(self, symbol: str, interval: str, df: pd.DataFrame) -> None:
+        """Write klines to the disk cache if it is enabled"""
+        if not self._disk_cache:
+            return
+        try:
+            kline_cache.store(symbol, interval, df)
+        except Exception as e:
+            binance_logger.error(f"Error caching data for {symbol} with interval {interval}: {e}")
+    
+    def _incremental_start(self, cached: pd.DataFrame, interval: str, limit: int) -> Optional[int]:
+        """
+        Start time (ms) for fetching only the bars missing from cached klines, or
+        None when the cache is empty, too short or too old and a full fetch is needed
+        """
+        if len(cached) < limit:
+            return None
+        
+        # Refetch from the last cached bar, it may still have been open when cached
+        last_open = pd.Timestamp(cached["opentime"].iat[-1]).value // 1_000_000
+        now = int(time.time() * 1000)
+        if now - last_open >= limit * _INTERVAL_SECONDS[interval] * 1000:
+            return None
+        return last_open
+    
+    def _merge_cached(self, cached: pd.DataFrame, df: pd.DataFrame, limit: int) -> pd.DataFrame:
+        """Append newly fetched bars to cached klines, keeping the latest limit bars"""
+        if df.empty:
+            return cached
+        
+        merged = pd.concat(
+            [cached[cached["opentime"] < df["opentime"].iat[0]], df],
+            ignore_index=True,
+        ).tail(limit).reset_index(drop=True)
+        # The first new bar's return depends on the last cached close
+        merged["log_returns"] = _log_returns(merged["close"].to_numpy(np.float64))
+        return merged.astype({"log_returns": _KLINE_DTYPES["log_returns"]})
+    
+    def _is_backing_off(self, symbol: str) -> bool:
+        """Whether requests for a symbol are paused after a failed request"""
+        remaining = self._retry_at.get(symbol, 0.0) - time.monotonic()
+        if remaining > 0:
+            binance_logger.warning(f"Backing off {symbol}, retrying in {remaining:.1f}s")
+            return True
+        return False
+    
+    def _note_failure(self, symbol: str, retry_after: Optional[str] = None) -> None:
+        """Double a symbol's backoff (capped at 60s), honouring Retry-After when given"""
+        delay = min(self._backoff.get(symbol, 0.5) * 2, 60.0)
+        if retry_after:
+            try:
+                delay = max(delay, float(retry_after))
+            except ValueError:
+                pass
+        self._backoff[symbol] = delay
+        self._retry_at[symbol] = time.monotonic() + delay
+    
+    def _clear_backoff(self, symbol: str) -> None:
+        """Reset a symbol's backoff after a successful request"""
+        self._backoff.pop(symbol, None)
+        self._retry_at.pop(symbol, None)
+    
+    def _get_cache_lock(self, key: Tuple[str, str, int]) -> asyncio.Lock:
+        """Get the per-key lock that stops concurrent fetches of the same klines"""
+        locks = self._cache_locks.setdefault(asyncio.get_running_loop(), {})
+        return locks.setdefault(key, asyncio.Lock())
+    
     def _process_kline_data(self, data: list) -> pd.DataFrame:
         """Process raw kline data into a structured DataFrame"""
         if not data:
             return pd.DataFrame()
             
-        df = pd.DataFrame(
-            data,
-            columns=[
-                "opentime",
-                "open",
-                "high", 
-                "low",
-                "close",
-                "volume",
-                "closetime",
-                "quote_volume",  # Fixed duplicate 'volume' column
-                "ntrades",
-                "taker_buy_base_volume",
-                "taker_buy_quote_volume",
-                "ignore",
-            ],
-        )
-        
-        # Convert timestamps
-        df["opentime"] = pd.to_datetime(df["opentime"], unit="ms")
-        df["closetime"] = pd.to_datetime(df["closetime"], unit="ms")
-        
-        # Convert numeric columns
-        numeric_cols = ["open", "high", "low", "close", "volume", "quote_volume"]
-        for col in numeric_cols:
-            df[col] = pd.to_numeric(df[col], errors='coerce')
+        # Build the frame column-wise from a single object array, the unused
+        # trade count / taker volume / ignore fields are never materialised and
+        # the freshly cast columns are handed to pandas without another copy
+        raw = np.asarray(data, dtype=object)
+        df = pd.DataFrame({
+            "opentime": pd.to_datetime(raw[:, 0].astype(np.int64), unit="ms"),
+            "open": raw[:, 1].astype(np.float64),
+            "high": raw[:, 2].astype(np.float64),
+            "low": raw[:, 3].astype(np.float64),
+            "close": raw[:, 4].astype(np.float64),
+            "volume": raw[:, 5].astype(np.float32),
+            "closetime": pd.to_datetime(raw[:, 6].astype(np.int64), unit="ms"),
+            "quote_volume": raw[:, 7].astype(np.float32),
+        }, copy=False)
         
         # Calculate log returns with proper error handling
-        df["log_returns"] = np.log(df["close"] / df["close"].shift(1))
+        df["log_returns"] = _log_returns(df["close"].to_numpy(np.float64))
         
-        # Drop unnecessary columns
-        df = df.drop([
-            "ntrades",
-            "taker_buy_base_volume", 
-            "taker_buy_quote_volume",
-            "ignore",
-        ], axis=1)
-        
-        return df
+        # Store the columns as Arrow arrays, downstream code keeps the pandas API
+        return df.astype(dict(_KLINE_DTYPES))
     
     def get_kline(self, symbol: str, interval: str, limit: int = 500) -> pd.DataFrame:
-        """Synchronous method to get kline data"""
+        """Synchronous method to get kline data, served from cache while fresh"""
+        key = (symbol, interval, limit)
+        cached = self._get_cached(key)
+        if cached is not None:
+            return cached
+        
+        stored, fresh = self._load_disk_cache(symbol, interval)
+        if fresh:
+            self._set_cached(key, stored)
+            return stored.copy(deep=False)
+        if self._is_backing_off(symbol):
+            return stored.copy(deep=False)
+        start = self._incremental_start(stored, interval, limit)
+        
         try:
             data = self.client.get_historical_klines(
                 symbol, 
-                self.intervals[interval], 
+                _INTERVALS[interval], 
+                start_str=start,
                 limit=limit
             )
-            return self._process_kline_data(data)
+            df = self._process_kline_data(data)
+        except BinanceAPIException as e:
+            retry_after = e.response.headers.get("Retry-After") if e.status_code in (418, 429) else None
+            self._note_failure(symbol, retry_after)
+            binance_logger.error(f"Error fetching data for {symbol} with interval {interval}: {e}")
+            return stored.copy(deep=False)
         except Exception as e:
+            self._note_failure(symbol)
             binance_logger.error(f"Error fetching data for {symbol} with interval {interval}: {e}")
-            return pd.DataFrame()
+            return stored.copy(deep=False)
+        
+        if start is not None:
+            df = self._merge_cached(stored, df, limit)
+        if df.empty:
+            # Nothing to serve, back off rather than asking again on every read
+            self._note_failure(symbol)
+            return df
+        self._clear_backoff(symbol)
+        self._set_cached(key, df)
+        self._store_disk_cache(symbol, interval, df)
+        return df.copy(deep=False)
     
     async def get_kline_async(self, symbol: str, interval: str, limit: int = 500) -> pd.DataFrame:
-        """Asynchronous method to get kline data"""
-        try:
-            # Run the synchronous Binance client call in a thread pool
-            loop = asyncio.get_event_loop()
-            data = await loop.run_in_executor(
-                None, 
-                lambda: self.client.get_historical_klines(
-                    symbol, 
-                    self.intervals[interval], 
-                    limit=limit
-                )
-            )
-            return self._process_kline_data(data)
-        except Exception as e:
-            binance_logger.error(f"Error fetching data for {symbol} with interval {interval}: {e}")
-            return pd.DataFrame()
+        """Asynchronous method to get kline data from the public klines endpoint, served from cache while fresh"""
+        key = (symbol, interval, limit)
+        cached = self._get_cached(key)
+        if cached is not None:
+            return cached
+        
+        async with self._get_cache_lock(key):
+            # Another task may have fetched the same klines while we waited
+            cached = self._get_cached(key)
+            if cached is not None:
+                return cached
+            
+            stored, fresh = self._load_disk_cache(symbol, interval)
+            if fresh:
+                self._set_cached(key, stored)
+                return stored.copy(deep=False)
+            if self._is_backing_off(symbol):
+                return stored.copy(deep=False)
+            start = self._incremental_start(stored, interval, limit)
+            
+            try:
+                params = {
+                    "symbol": symbol,
+                    "interval": _INTERVALS[interval],
+                    "limit": limit,
+                }
+                if start is not None:
+                    params["startTime"] = start
+                async with self._get_session().get(self.klines_url, params=params) as response:
+                    response.raise_for_status()
+                    data = await response.json()
+                df = self._process_kline_data(data)
+            except aiohttp.ClientResponseError as e:
+                retry_after = None
+                if e.status in (418, 429) and e.headers:
+                    retry_after = e.headers.get("Retry-After")
+                self._note_failure(symbol, retry_after)
+                binance_logger.error(f"Error fetching data for {symbol} with interval {interval}: {e}")
+                return stored.copy(deep=False)
+            except Exception as e:
+                self._note_failure(symbol)
+                binance_logger.error(f"Error fetching data for {symbol} with interval {interval}: {e}")
+                return stored.copy(deep=False)
+            
+            if start is not None:
+                df = self._merge_cached(stored, df, limit)
+            if df.empty:
+                # Nothing to serve, back off rather than asking again on every read
+                self._note_failure(symbol)
+                return df
+            self._clear_backoff(symbol)
+            self._set_cached(key, df)
+            self._store_disk_cache(symbol, interval, df)
+            return df.copy(deep=False)
+    
+    async def get_bulk_klines_async(
+        self, symbols: Sequence[str], interval: str, limit: int = 500, max_concurrency: int = 8
+    ) -> List[Union[pd.DataFrame, BaseException]]:
+        """Fetch kline data for several symbols over the shared session, results follow the order of symbols"""
+        # Binance has no multi-symbol klines endpoint, so bound the fan-out instead
+        semaphore = asyncio.Semaphore(max_concurrency)
+        
+        async def fetch(symbol: str) -> pd.DataFrame:
+            async with semaphore:
+                return await self.get_kline_async(symbol, interval, limit)
+        
+        return await asyncio.gather(
+            *(fetch(symbol) for symbol in symbols),
+            return_exceptions=True,
+        )
+    
+    async def close(self) -> None:
+        """Close the aiohttp session of the running event loop, other loops' sessions are left open"""
+        loop = asyncio.get_running_loop()
+        self._cache_locks.pop(loop, None)
+        session = self._sessions.pop(loop, None)
+        if session is not None and not session.closed:
+            await session.close()
     
     def save_data(self, data: pd.DataFrame, path: str) -> None:
-        """Save DataFrame to CSV"""
-        if not data.empty:
-            data.to_csv(path, index=False)
+        """Save DataFrame to Parquet"""
+        kline_cache.write(path, data)
+    
+    def load_data(self, path: str) -> pd.DataFrame:
+        """Load a DataFrame previously written by save_data"""
+        return kline_cache.read(path)
     
     def test_connection(self) -> None:
         """Test the connection to Binance API"""
@@ -118,7 +386,7 @@ class HistoricalData:
             self.client.get_account()
             binance_logger.info("Connection successful")
         except BinanceAPIException as e:
-            error_msg = self.error_messages.get(e.code, f"Unknown error code: {e.code}")
+            error_msg = _ERROR_MESSAGES.get(e.code, f"Unknown error code: {e.code}")
             binance_logger.error(f"Diagnosis: {error_msg}")
             raise e
         except BinanceRequestException as e:
@@ -3,22 +3,46 @@ import datetime as dt
 from data.binance_connector import HistoricalData
 from src.util import parse_json
 import random
-from typing import Dict, Union, List, Optional
-from functools import reduce
+from operator import itemgetter
+from typing import Any, Awaitable, Dict, Union, List, Optional, Sequence, Tuple
 import numpy as np
 from src.logger import data_management_logger
 import colorsys
 import asyncio
+import atexit
+import threading
+import time
+
+
+# Evenly spaced hues for new symbols, indexed by the order they were added
+PALETTE = [
+    "#%02x%02x%02x" % tuple(int(255 * c) for c in colorsys.hsv_to_rgb(i / 64, 0.7, 0.85))
+    for i in range(64)
+]
+
+
+# Which of (v, t, p, q) feeds r, g and b in each hue sextant
+_HUE_SEXTANTS = (
+    (0, 1, 2), (3, 0, 2), (2, 0, 1), (2, 3, 0), (1, 2, 0), (0, 2, 3)
+)
 
 
 def get_random_color() -> str:
     """Generate a random hex color"""
-    h = random.random()
+    h6 = random.random() * 6.0
+    i = int(h6)
+    f = h6 - i
     s = 0.5 + random.random() / 2.0  # Saturation between 0.5 and 1.0
     v = 0.5 + random.random() / 2.0  # Value between 0.5 and 1.0
 
-    rgb = colorsys.hsv_to_rgb(h, s, v)
-    return f"#{int(rgb[0] * 255):02x}{int(rgb[1] * 255):02x}{int(rgb[2] * 255):02x}"
+    channels = (
+        int(v * 255),
+        int(v * (1.0 - s * (1.0 - f)) * 255),
+        int(v * (1.0 - s) * 255),
+        int(v * (1.0 - s * f) * 255),
+    )
+    r, g, b = _HUE_SEXTANTS[i % 6]
+    return f"#{channels[r] << 16 | channels[g] << 8 | channels[b]:06x}"
 
 
 def find_earliest_datetime_key(
@@ -37,71 +61,139 @@ def find_earliest_datetime_key(
     if not datetime_dict:
         return None
 
-    min_datetime = min(datetime_dict.values())
+    if not return_all:
+        # min keeps the first key found with the minimum value
+        return min(datetime_dict.items(), key=itemgetter(1))[0]
 
-    if return_all:
-        return [key for key, value in datetime_dict.items() if value == min_datetime]
-    else:
-        # Return first key found with minimum value
-        return next(
-            key for key, value in datetime_dict.items() if value == min_datetime
-        )
+    min_datetime = None
+    keys = []
+    for key, value in datetime_dict.items():
+        if min_datetime is None or value < min_datetime:
+            min_datetime = value
+            keys = [key]
+        elif value == min_datetime:
+            keys.append(key)
+    return keys
+
+
+def _portfolio_values(close: np.ndarray, units: np.ndarray) -> np.ndarray:
+    """
+    Portfolio value per row of a (rows, symbols) close array
+
+    Missing closes count as 0. The close array is zero-filled in place so no
+    filled copy is made before the matrix-vector product. Pass close and units
+    with the same dtype, otherwise the product upcasts with a hidden copy.
+    """
+    np.nan_to_num(close, copy=False, nan=0.0)
+    return close @ units
 
 
 class PortfolioManager:
     """
     A thread-safe singleton class to manage the portfolio of assets.
     Supports both synchronous and asynchronous data loading.
+
+    Every change to the symbols and their attribute arrays, and every read
+    that builds a frame from them, holds _state_lock, so concurrent Dash
+    callbacks never see the arrays and the symbol list at different lengths.
+    The lock is never held across a network fetch.
     """
 
+    __slots__ = (
+        "_saved_data",
+        "_historical_data",
+        "_numeric_attributes",
+        "symbols",
+        "_idx",
+        "_units",
+        "_close",
+        "_value",
+        "_weight",
+        "_weights_stale",
+        "_setters",
+        "_symbol_list_cache",
+        "_next_colour",
+        "_last_loaded",
+        "portfolio_value",
+        "combined_data",
+        "_combined_mask",
+        "portfolio_performance",
+        "_ready",
+        "_initialized",
+        "_state_lock",
+        "_loop",
+    )
+
     _instance = None
     _lock = asyncio.Lock()
+    _instance_lock = threading.Lock()
+    _TTL_SECONDS = 300
+
+    _historical_data: HistoricalData
 
     def __init__(self, api_key: str, api_secret: str, saved_data: bool = False):
-        if not hasattr(self, "_initialized"):
+        if hasattr(self, "_initialized"):
+            return
+
+        with self._instance_lock:
+            if hasattr(self, "_initialized"):
+                return
+
+            self._state_lock = threading.RLock()
+            # One long-lived event loop for all async work, so the aiohttp session
+            # and its keep-alive connections to Binance outlive a single callback
+            self._loop = asyncio.new_event_loop()
+            threading.Thread(
+                target=self._loop.run_forever, name="portfolio-loop", daemon=True
+            ).start()
+            atexit.register(self._stop_loop)
             self._saved_data = saved_data
-            self._historical_data = HistoricalData(api_key, api_secret)
-            self._symbol_attributes = ["units", "data", "close", "value", "weight"]
+            self._historical_data = HistoricalData(
+                api_key, api_secret, disk_cache=saved_data
+            )
+            self._numeric_attributes = ("units", "close", "value", "weight")
 
-            # Initialize with default symbols
+            # Initialize with default symbols, per-symbol objects live here while
+            # the numeric attributes are kept as arrays indexed by self._idx
             self.symbols = {
-                "BTCUSDT": {
-                    "units": 1.0,
-                    "data": pd.DataFrame(),
-                    "close": 0.0,
-                    "value": 0.0,
-                    "weight": 0.0,
-                    "colour": "#FF6B6B",
-                },
-                "ETHUSDT": {
-                    "units": 1.0,
-                    "data": pd.DataFrame(),
-                    "close": 0.0,
-                    "value": 0.0,
-                    "weight": 0.0,
-                    "colour": "#4ECDC4",
-                },
-                "SOLUSDC": {
-                    "units": 1.0,
-                    "data": pd.DataFrame(),
-                    "close": 0.0,
-                    "value": 0.0,
-                    "weight": 0.0,
-                    "colour": "#45B7D1",
-                },
+                "BTCUSDT": {"data": pd.DataFrame(), "colour": "#FF6B6B", "interval": "1h"},
+                "ETHUSDT": {"data": pd.DataFrame(), "colour": "#4ECDC4", "interval": "1h"},
+                "SOLUSDC": {"data": pd.DataFrame(), "colour": "#45B7D1", "interval": "1h"},
             }
-
-            self._last_loaded = {
-                symbol: dt.datetime.now() for symbol in self.symbols.keys()
+            n_symbols = len(self.symbols)
+            self._idx = {symbol: i for i, symbol in enumerate(self.symbols)}
+            self._units = np.ones(n_symbols)
+            self._close = np.zeros(n_symbols)
+            self._value = np.zeros(n_symbols)
+            self._weight = np.zeros(n_symbols)
+            self._weights_stale = False
+            self._symbol_list_cache: Optional[Tuple[str, ...]] = None
+            # Palette index for the next added symbol, never reused after a removal
+            self._next_colour = n_symbols
+
+            # Dispatch table for update_symbol_element, one bound setter per attribute
+            self._setters = {
+                "units": self._set_units,
+                "data": self._set_data_element,
+                "close": self._set_close,
+                "value": self._set_value,
+                "weight": self._set_weight,
             }
+
+            # time.monotonic() of the last fetch, only for symbols actually fetched
+            self._last_loaded: Dict[str, float] = {}
             self.portfolio_value = 0.0
             self.combined_data = None
+            self._combined_mask: Optional[np.ndarray] = None
             self.portfolio_performance = None
+            self._ready = False
             self._initialized = True
 
     def __new__(cls, api_key: str, api_secret: str, saved_data: bool = False):
         if cls._instance is None:
-            cls._instance = super(PortfolioManager, cls).__new__(cls)
+            with cls._instance_lock:
+                if cls._instance is None:
+                    cls._instance = super(PortfolioManager, cls).__new__(cls)
         return cls._instance
 
     @classmethod
@@ -115,283 +207,524 @@ class PortfolioManager:
                 await cls._instance.update_all_symbols_async(interval="1h")
             return cls._instance
 
-    def get_symbol_list(self) -> List[str]:
-        """Get list of all symbols in the portfolio"""
-        return list(self.symbols.keys())
+    async def ready(self) -> None:
+        """Load all symbols and build the combined data once, no-op when already loaded"""
+        if self._ready:
+            return
+
+        await self._update_symbol_data_async(self.get_symbol_list())
+        self.gen_combine_ohlc()
+        self.gen_portfolio_performance()
+        self._ready = True
+
+    def run_sync(self, coro: Awaitable[Any]) -> Any:
+        """Run a coroutine on the manager's event loop thread and wait for its result"""
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is self._loop:
+            raise RuntimeError("run_sync would deadlock on the manager's own event loop")
+
+        return asyncio.run_coroutine_threadsafe(coro, self._loop).result()
+
+    def _stop_loop(self) -> None:
+        """Close the HTTP session on the manager's event loop and stop the loop, run at exit"""
+        if not self._loop.is_running():
+            return
+        try:
+            asyncio.run_coroutine_threadsafe(
+                self._historical_data.close(), self._loop
+            ).result(timeout=5)
+        except Exception as e:
+            data_management_logger.error(f"Error closing the HTTP session: {e}")
+        finally:
+            self._loop.call_soon_threadsafe(self._loop.stop)
+
+    def get_symbol_list(self) -> Tuple[str, ...]:
+        """
+        Get all symbols in the portfolio, cached until symbols are added or removed
+
+        Returned as a tuple so callers cannot reorder the cached symbols out of
+        step with the attribute arrays.
+        """
+        with self._state_lock:
+            if self._symbol_list_cache is None:
+                self._symbol_list_cache = tuple(self.symbols)
+            return self._symbol_list_cache
+
+    def _append_symbol(self, symbol: str, units: float, interval: str) -> None:
+        """Register a new symbol and grow the attribute arrays, the caller holds _state_lock"""
+        colour = PALETTE[self._next_colour % len(PALETTE)]
+        self._next_colour += 1
+        self.symbols[symbol] = {"data": pd.DataFrame(), "colour": colour, "interval": interval}
+        self._idx[symbol] = len(self._idx)
+        self._symbol_list_cache = None
+        self._units = np.append(self._units, units)
+        self._close = np.append(self._close, 0.0)
+        self._value = np.append(self._value, 0.0)
+        self._weight = np.append(self._weight, 0.0)
+
+    def _update_close(self, symbol: str) -> None:
+        """Set a symbol's close to the latest close in its data, the caller holds _state_lock"""
+        data = self.symbols[symbol]["data"]
+        self._close[self._idx[symbol]] = (
+            float(data["close"].iat[-1]) if not data.empty else 0.0
+        )
+
+    def _set_data(self, symbol: str, data: pd.DataFrame, interval: str) -> bool:
+        """
+        Store a symbol's freshly fetched data, its interval and its latest close
+
+        A failed (empty) fetch keeps the previous data and leaves the symbol
+        stale, so it is retried once the connector's backoff has passed.
+        Returns whether the data was stored, False also when the symbol was
+        removed while its data was being fetched.
+        """
+        if data.empty:
+            data_management_logger.warning(f"No data received for {symbol}, will retry")
+            return False
+        with self._state_lock:
+            if symbol not in self.symbols:
+                return False
+            self.symbols[symbol]["data"] = data
+            # Later reloads fetch the interval the stored data was fetched at
+            self.symbols[symbol]["interval"] = interval
+            self._update_close(symbol)
+            self._last_loaded[symbol] = time.monotonic()
+            return True
+
+    def _is_stale(self, symbol: str) -> bool:
+        """Whether a symbol has never been loaded or was loaded over _TTL_SECONDS ago"""
+        last_loaded = self._last_loaded.get(symbol)
+        return last_loaded is None or time.monotonic() - last_loaded > self._TTL_SECONDS
+
+    def _interval(self, symbol: str, interval: Optional[str] = None) -> str:
+        """The requested interval, or the interval the symbol's data is kept at"""
+        if interval is not None:
+            return interval
+        with self._state_lock:
+            return self.symbols[symbol]["interval"]
+
+    def _load_data(
+        self, symbol: str, interval: Optional[str] = None, force_load: bool = False
+    ) -> bool:
+        """Fetch a symbol's data in place if forced or stale, returns whether new data was stored"""
+        if force_load or self._is_stale(symbol):
+            data_management_logger.debug("Loading data for symbol %s", symbol)
+            interval = self._interval(symbol, interval)
+            return self._set_data(
+                symbol, self._historical_data.get_kline(symbol, interval), interval
+            )
+        return False
+
+    def _ensure_loaded(self, symbol: str) -> None:
+        """Fetch a symbol's data on access if it has never been loaded or is stale"""
+        if self._load_data(symbol):
+            with self._state_lock:
+                self.recompute_portfolio()
+                self._invalidate_computed_data()
+
+    async def update_stale_symbols_async(self) -> None:
+        """Fetch every stale symbol in one concurrent batch (asynchronous)"""
+        stale = [symbol for symbol in self.get_symbol_list() if self._is_stale(symbol)]
+        if stale:
+            await self._update_symbol_data_async(stale)
 
     def add_symbol(self, symbol: str, units: float = 1.0, interval: str = "1m") -> None:
         """Add a new symbol to the portfolio (synchronous)"""
         symbol = symbol.upper()
-        if symbol not in self.symbols:
-            self.symbols[symbol] = {
-                attr: 0.0 if attr != "data" else pd.DataFrame()
-                for attr in self._symbol_attributes
-            }
-            self.symbols[symbol]["units"] = units
-            self.symbols[symbol]["data"] = self._historical_data.get_kline(
-                symbol, interval
-            )
-            self.symbols[symbol]["close"] = (
-                self.symbols[symbol]["data"]["close"].iloc[-1]
-                if not self.symbols[symbol]["data"].empty
-                else 0.0
-            )
-            self.symbols[symbol]["value"] = self.symbols[symbol]["close"] * units
-            self.symbols[symbol]["colour"] = get_random_color()
-            self._last_loaded[symbol] = dt.datetime.now()
-            self._calculate_weighting()
-        else:
-            data_management_logger.info(
-                f"Symbol {symbol} already exists in symbols dictionary."
-            )
+        with self._state_lock:
+            if symbol in self.symbols:
+                data_management_logger.info(
+                    f"Symbol {symbol} already exists in symbols dictionary."
+                )
+                return
+            self._append_symbol(symbol, units, interval)
+
+        data = self._historical_data.get_kline(symbol, interval)
+        with self._state_lock:
+            self._set_data(symbol, data, interval)
+            self.recompute_portfolio()
+            self._invalidate_computed_data()
 
     async def add_symbol_async(
         self, symbol: str, units: float = 1.0, interval: str = "1m"
     ) -> None:
         """Add a new symbol to the portfolio (asynchronous)"""
         symbol = symbol.upper()
-        if symbol not in self.symbols:
-            self.symbols[symbol] = {
-                attr: 0.0 if attr != "data" else pd.DataFrame()
-                for attr in self._symbol_attributes
-            }
-            self.symbols[symbol]["units"] = units
-            self.symbols[symbol]["data"] = await self._historical_data.get_kline_async(
-                symbol, interval
-            )
-            self.symbols[symbol]["close"] = (
-                self.symbols[symbol]["data"]["close"].iloc[-1]
-                if not self.symbols[symbol]["data"].empty
-                else 0.0
-            )
-            self.symbols[symbol]["value"] = self.symbols[symbol]["close"] * units
-            self.symbols[symbol]["colour"] = get_random_color()
-            self._last_loaded[symbol] = dt.datetime.now()
-            self._calculate_weighting()
-        else:
-            data_management_logger.info(
-                f"Symbol {symbol} already exists in symbols dictionary."
-            )
+        with self._state_lock:
+            if symbol in self.symbols:
+                data_management_logger.info(
+                    f"Symbol {symbol} already exists in symbols dictionary."
+                )
+                return
+            self._append_symbol(symbol, units, interval)
+
+        data = await self._historical_data.get_kline_async(symbol, interval)
+        with self._state_lock:
+            self._set_data(symbol, data, interval)
+            self.recompute_portfolio()
+            self._invalidate_computed_data()
 
     def remove_symbol(self, symbol: str) -> None:
         """Remove a symbol from the portfolio"""
-        if symbol in self.symbols:
-            del self.symbols[symbol]
-            if symbol in self._last_loaded:
-                del self._last_loaded[symbol]
-            self._calculate_weighting()
-            self._invalidate_computed_data()
-        else:
-            data_management_logger.warning(
-                f"Symbol {symbol} not found in symbols dictionary."
-            )
+        with self._state_lock:
+            if symbol in self.symbols:
+                i = self._idx[symbol]
+                del self.symbols[symbol]
+                self._idx = {s: j for j, s in enumerate(self.symbols)}
+                self._symbol_list_cache = None
+                self._units = np.delete(self._units, i)
+                self._close = np.delete(self._close, i)
+                self._value = np.delete(self._value, i)
+                self._weight = np.delete(self._weight, i)
+                if symbol in self._last_loaded:
+                    del self._last_loaded[symbol]
+                self.recompute_portfolio()
+                self._invalidate_computed_data()
+            else:
+                data_management_logger.warning(
+                    f"Symbol {symbol} not found in symbols dictionary."
+                )
 
     def update_symbol(
-        self, symbol: str, units: Optional[float] = None, interval: str = "1h"
+        self, symbol: str, units: Optional[float] = None, interval: Optional[str] = None
     ) -> None:
         """Update a symbol's data (synchronous)"""
-        if symbol not in self.symbols:
-            raise ValueError(f"Symbol {symbol} not found in symbols dictionary.")
+        with self._state_lock:
+            if symbol not in self.symbols:
+                raise ValueError(f"Symbol {symbol} not found in symbols dictionary.")
 
-        if units is not None:
-            self.symbols[symbol]["units"] = units
+            if units is not None:
+                self._units[self._idx[symbol]] = units
 
-        self.symbols[symbol]["data"] = self._historical_data.get_kline(symbol, interval)
-        self.symbols[symbol]["close"] = (
-            self.symbols[symbol]["data"]["close"].iloc[-1]
-            if not self.symbols[symbol]["data"].empty
-            else 0.0
-        )
-        self.symbols[symbol]["value"] = (
-            self.symbols[symbol]["close"] * self.symbols[symbol]["units"]
-        )
-        self._last_loaded[symbol] = dt.datetime.now()
-        self._calculate_weighting()
-        self._invalidate_computed_data()
+        self._load_data(symbol, interval, force_load=True)
+        with self._state_lock:
+            self.recompute_portfolio()
+            self._invalidate_computed_data()
 
     async def update_symbol_async(
-        self, symbol: str, units: Optional[float] = None, update_data:bool = False, interval: str = "1h"
+        self, symbol: str, units: Optional[float] = None, update_data:bool = False, interval: Optional[str] = None
     ) -> None:
         """Update a symbol's data (asynchronous)"""
-        if symbol not in self.symbols:
-            raise ValueError(f"Symbol {symbol} not found in symbols dictionary.")
+        with self._state_lock:
+            if symbol not in self.symbols:
+                raise ValueError(f"Symbol {symbol} not found in symbols dictionary.")
 
-        if units is not None:
-            self.symbols[symbol]["units"] = units
+            if units is not None:
+                self._units[self._idx[symbol]] = units
 
         if update_data:
-            self.symbols[symbol]["data"] = await self._historical_data.get_kline_async(
-                symbol, interval
+            interval = self._interval(symbol, interval)
+            self._set_data(
+                symbol, await self._historical_data.get_kline_async(symbol, interval), interval
+            )
+
+        with self._state_lock:
+            if not update_data and symbol in self.symbols:
+                self._update_close(symbol)
+            self.recompute_portfolio()
+            self._invalidate_computed_data()
+
+    async def _update_symbol_data_async(
+        self, symbols: Sequence[str], interval: Optional[str] = None
+    ) -> None:
+        """
+        Fetch data for the given symbols in one concurrent batch and refresh their values
+
+        Without an interval each symbol is fetched at its own, with one bulk
+        request per distinct interval.
+        """
+        groups: Dict[str, List[str]] = {}
+        with self._state_lock:
+            for symbol in symbols:
+                # Skip symbols removed since the caller listed them
+                if symbol in self.symbols:
+                    groups.setdefault(self._interval(symbol, interval), []).append(symbol)
+
+        results = await asyncio.gather(
+            *(
+                self._historical_data.get_bulk_klines_async(group, group_interval)
+                for group_interval, group in groups.items()
             )
-        
-        self.symbols[symbol]["close"] = (
-            self.symbols[symbol]["data"]["close"].iloc[-1]
-            if not self.symbols[symbol]["data"].empty
-            else 0.0
-        )
-        self.symbols[symbol]["value"] = (
-            self.symbols[symbol]["close"] * self.symbols[symbol]["units"]
         )
-        self._last_loaded[symbol] = dt.datetime.now()
-        self._calculate_weighting()
-        self._invalidate_computed_data()
+        stored = False
+        for (group_interval, group), group_results in zip(groups.items(), results):
+            for symbol, data in zip(group, group_results):
+                if isinstance(data, BaseException):
+                    data_management_logger.error(f"Error updating data for {symbol}: {data}")
+                    continue
+                stored |= self._set_data(symbol, data, group_interval)
+
+        # Failed or backed-off fetches change nothing, so keep the cached frames
+        if stored:
+            with self._state_lock:
+                self.recompute_portfolio()
+                self._invalidate_computed_data()
+
+    def update_symbol_data(
+        self, symbols: Optional[Sequence[str]] = None, interval: Optional[str] = None
+    ) -> None:
+        """Fetch data for the given symbols (default: all) concurrently (synchronous)"""
+        symbols = self.get_symbol_list() if symbols is None else symbols
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            self.run_sync(self._update_symbol_data_async(symbols, interval))
+            return
+
+        # Already inside an event loop, a nested run_sync is not allowed here
+        for symbol in symbols:
+            self.update_symbol(symbol, interval=interval)
 
     def update_all_symbols(
-        self, units: Optional[float] = None, interval: str = "1h"
+        self, units: Optional[float] = None, interval: Optional[str] = None
     ) -> None:
         """Update all symbols (synchronous)"""
-        for symbol in self.symbols.keys():
-            self.update_symbol(symbol, units, interval)
+        if units is not None:
+            with self._state_lock:
+                self._units[:] = units
+        self.update_symbol_data(interval=interval)
 
     async def update_all_symbols_async(
-        self, units: Optional[float] = None, update_data:bool = False, interval: str = "1h"
+        self, units: Optional[float] = None, update_data:bool = False, interval: Optional[str] = None
     ) -> None:
-        """Update all symbols concurrently (asynchronous)"""
-        tasks = []
-        for symbol in self.symbols.keys():
-            task = self.update_symbol_async(symbol, units, update_data, interval)
-            tasks.append(task)
+        """Update all symbols, fetching their data in one batch (asynchronous)"""
+        if units is not None:
+            with self._state_lock:
+                self._units[:] = units
 
-        await asyncio.gather(*tasks, return_exceptions=True)
+        if update_data:
+            await self._update_symbol_data_async(self.get_symbol_list(), interval)
+            return
+
+        with self._state_lock:
+            for symbol in self.get_symbol_list():
+                self._update_close(symbol)
+            self.recompute_portfolio()
+            self._invalidate_computed_data()
+
+    def _update_value(self, i: int) -> None:
+        """Refresh one symbol's value and adjust the portfolio value by the difference"""
+        value = self._close[i] * self._units[i]
+        self.portfolio_value += float(value - self._value[i])
+        self._value[i] = value
+        # Weights are rebuilt on the next read rather than on every edit
+        self._weights_stale = True
+
+    def _set_units(self, symbol: str, value: float) -> None:
+        i = self._idx[symbol]
+        self._units[i] = value
+        self._update_value(i)
+
+    def _set_close(self, symbol: str, value: float) -> None:
+        i = self._idx[symbol]
+        self._close[i] = value
+        self._update_value(i)
+
+    def _set_value(self, symbol: str, value: float) -> None:
+        i = self._idx[symbol]
+        # Keep the running portfolio total in step with the overridden value
+        self.portfolio_value += float(value - self._value[i])
+        self._value[i] = value
+        self._weights_stale = True
+
+    def _set_weight(self, symbol: str, value: float) -> None:
+        self._refresh_weights()
+        self._weight[self._idx[symbol]] = value
+
+    def _set_data_element(self, symbol: str, value: pd.DataFrame) -> None:
+        self.symbols[symbol]["data"] = value
 
     def update_symbol_element(self, symbol: str, element: str, value: float) -> None:
         """Update a specific element of a symbol"""
-        if symbol not in self.symbols:
-            raise ValueError(f"Symbol {symbol} not found in symbols dictionary.")
-
-        if element not in self._symbol_attributes:
+        setter = self._setters.get(element)
+        if setter is None:
             raise ValueError(f"Element {element} not found in symbol attributes.")
 
-        self.symbols[symbol][element] = value
-        if element in ["units", "close"]:
-            self.symbols[symbol]["value"] = (
-                self.symbols[symbol]["close"] * self.symbols[symbol]["units"]
-            )
-            self._calculate_weighting()
+        with self._state_lock:
+            if symbol not in self.symbols:
+                raise ValueError(f"Symbol {symbol} not found in symbols dictionary.")
+
+            setter(symbol, value)
 
     def get_symbol_element(
         self, symbol: str, element: str
     ) -> Union[float, pd.DataFrame]:
-        """Get a specific element of a symbol"""
+        """
+        Get a specific element of a symbol
+
+        "data" is returned as a shallow copy: callers may add, drop or rename
+        columns and reset the index without touching the stored frame, but the
+        underlying arrays are shared and must not be modified in place.
+        """
         if symbol not in self.symbols:
             raise ValueError(f"Symbol {symbol} not found in symbols dictionary.")
 
-        if element not in self.symbols[symbol]:
-            raise ValueError(f"Element {element} not found in symbol {symbol}.")
+        self._ensure_loaded(symbol)
 
-        return self.symbols[symbol][element]
+        with self._state_lock:
+            if symbol not in self.symbols:
+                raise ValueError(f"Symbol {symbol} not found in symbols dictionary.")
 
-    def _calculate_weighting(self) -> None:
-        """Calculate portfolio value and symbol weights"""
-        self.portfolio_value = sum(
-            self.symbols[symbol]["value"] for symbol in self.symbols.keys()
-        )
+            if element == "weight":
+                self._refresh_weights()
+
+            if element in self._numeric_attributes:
+                return float(getattr(self, f"_{element}")[self._idx[symbol]])
+
+            if element not in self.symbols[symbol]:
+                raise ValueError(f"Element {element} not found in symbol {symbol}.")
+
+            if element == "data":
+                return self.symbols[symbol]["data"].copy(deep=False)
+
+            return self.symbols[symbol][element]
+
+    def recompute_portfolio(self) -> None:
+        """Recalculate symbol values, portfolio value and weights in one vectorised pass"""
+        with self._state_lock:
+            # The arrays always share one length, so write into them in place
+            np.multiply(self._close, self._units, out=self._value)
+            self.portfolio_value = float(self._value.sum())
+            self._weights_stale = True
+            self._refresh_weights()
+
+    def _refresh_weights(self) -> None:
+        """Rebuild the weights from the current values if an edit made them stale, the caller holds _state_lock"""
+        if not self._weights_stale:
+            return
 
         if self.portfolio_value > 0:
-            for symbol in self.symbols.keys():
-                self.symbols[symbol]["weight"] = (
-                    self.symbols[symbol]["value"] / self.portfolio_value
-                )
+            np.divide(self._value, self.portfolio_value, out=self._weight)
         else:
-            for symbol in self.symbols.keys():
-                self.symbols[symbol]["weight"] = 0.0
+            self._weight.fill(0.0)
+        self._weights_stale = False
 
     def _invalidate_computed_data(self) -> None:
-        """Invalidate cached computed data"""
+        """Invalidate cached computed data, the caller holds _state_lock"""
         self.combined_data = None
+        self._combined_mask = None
         self.portfolio_performance = None
 
     def gen_combine_ohlc(self) -> None:
         """Generate combined OHLC data for all symbols"""
-        if not self.symbols:
-            self.combined_data = pd.DataFrame()
-            return
-
-        col_lst = ["open", "high", "low", "close", "volume", "log_returns"]
-        dfs = []
-
-        for symbol in self.get_symbol_list():
-            data = self.symbols[symbol]["data"]
-            if not data.empty:
-                renamed_data = data.copy()
-                for col in col_lst:
-                    if col in renamed_data.columns:
-                        renamed_data = renamed_data.rename(
-                            columns={col: f"{col}_{symbol}"}
-                        )
-                dfs.append(renamed_data)
-
-        if dfs:
-            try:
-                self.combined_data = reduce(
-                    lambda left, right: pd.merge(
-                        left, right, on=["closetime", "opentime"], how="outer"
-                    ),
-                    dfs,
-                )
-            except Exception as e:
-                data_management_logger.error(f"Error combining OHLC data: {e}")
+        with self._state_lock:
+            symbols = self.get_symbol_list()
+            # Which symbols have columns in the combined data, aligned with the attribute arrays
+            self._combined_mask = np.zeros(len(symbols), dtype=bool)
+            if not self.symbols:
+                self.combined_data = pd.DataFrame()
+                return
+
+            dfs = []
+
+            for i, symbol in enumerate(symbols):
+                data = self.symbols[symbol]["data"]
+                if not data.empty:
+                    self._combined_mask[i] = True
+                    # One shallow rename, then index the renamed frame in place,
+                    # so the stored data is neither copied nor modified
+                    renamed = data.rename(
+                        columns=lambda col: col if col == "opentime" else f"{col}_{symbol}",
+                        copy=False,
+                    )
+                    renamed.set_index("opentime", inplace=True)
+                    dfs.append(renamed)
+
+            if dfs:
+                try:
+                    # One outer join of every symbol on the shared opentime index
+                    self.combined_data = (
+                        pd.concat(dfs, axis=1, join="outer", copy=False)
+                        .sort_index()
+                        .reset_index()
+                    )
+                except Exception as e:
+                    data_management_logger.error(f"Error combining OHLC data: {e}")
+                    self.combined_data = pd.DataFrame()
+                    self._combined_mask[:] = False
+            else:
                 self.combined_data = pd.DataFrame()
-        else:
-            self.combined_data = pd.DataFrame()
 
     def get_combined_ohlc(self) -> pd.DataFrame:
         """Get combined OHLC data for all symbols"""
-        if self.combined_data is None:
-            self.gen_combine_ohlc()
-        return self.combined_data
+        with self._state_lock:
+            if self.combined_data is None:
+                self.gen_combine_ohlc()
+            return self.combined_data
 
     def gen_portfolio_performance(self) -> None:
         """Generate portfolio performance data"""
-        if self.combined_data is None or self.combined_data.empty:
-            self.portfolio_performance = pd.DataFrame()
-
-        close_cols = [f"close_{symbol}" for symbol in self.get_symbol_list()]
-        units = [self.symbols[symbol]["units"] for symbol in self.get_symbol_list()]
-
-        # Filter out columns that don't exist
-        existing_close_cols = [
-            col for col in close_cols if col in self.combined_data.columns
-        ]
-        existing_units = [
-            units[i]
-            for i, col in enumerate(close_cols)
-            if col in self.combined_data.columns
-        ]
-
-        if existing_close_cols and existing_units:
-            result = pd.DataFrame()
-            result["opentime"] = self.combined_data["opentime"]
-            result["portfolio_value"] = np.dot(
-                self.combined_data[existing_close_cols].fillna(0), existing_units
-            )
-            self.portfolio_performance = result
-        else:
-            self.portfolio_performance = pd.DataFrame()
+        with self._state_lock:
+            if self.combined_data is None:
+                self.gen_combine_ohlc()
+            if self.combined_data.empty:
+                self.portfolio_performance = pd.DataFrame()
+                return
+
+            # Only symbols with columns in the combined data, as recorded when it was built
+            mask = self._combined_mask
+            existing_close_cols = [
+                f"close_{symbol}"
+                for symbol, keep in zip(self.get_symbol_list(), mask)
+                if keep
+            ]
+            existing_units = self._units[mask]
+
+            if existing_close_cols:
+                # float64 throughout, float32 sums lose cents above ~$131k
+                close = self.combined_data[existing_close_cols].to_numpy(
+                    dtype=np.float64, na_value=np.nan
+                )
+                self.portfolio_performance = pd.DataFrame(
+                    {
+                        "opentime": self.combined_data["opentime"],
+                        "portfolio_value": _portfolio_values(close, existing_units),
+                    },
+                    copy=False,
+                )
+            else:
+                self.portfolio_performance = pd.DataFrame()
 
     def get_portfolio_performance(self) -> pd.DataFrame:
         """Get portfolio performance data"""
-        if self.portfolio_performance is None:
-            self.gen_portfolio_performance()
-        return self.portfolio_performance
+        with self._state_lock:
+            if self.portfolio_performance is None:
+                self.gen_portfolio_performance()
+            return self.portfolio_performance
+
+    def get_meta(self) -> pd.DataFrame:
+        """Get the per-symbol attributes as one DataFrame indexed by symbol, without fetching"""
+        with self._state_lock:
+            self._refresh_weights()
+            symbols = self.get_symbol_list()
+            # Built from a dict, so the frame copies the arrays rather than sharing them
+            return pd.DataFrame(
+                {
+                    "units": self._units,
+                    "close": self._close,
+                    "value": self._value,
+                    "weight": self._weight,
+                    "colour": [self.symbols[symbol]["colour"] for symbol in symbols],
+                },
+                index=pd.Index(symbols, name="symbol"),
+            )
 
     def get_portfolio_summary(self) -> Dict:
         """Get a summary of the portfolio"""
-        return {
-            "total_value": self.portfolio_value,
-            "symbols": {
-                symbol: {
-                    "units": data["units"],
-                    "close": data["close"],
-                    "value": data["value"],
-                    "weight": data["weight"],
-                }
-                for symbol, data in self.symbols.items()
-            },
-            "last_updated": max(self._last_loaded.values())
-            if self._last_loaded
-            else None,
-        }
+        with self._state_lock:
+            return {
+                "total_value": self.portfolio_value,
+                "symbols": self.get_meta()[["units", "close", "value", "weight"]].to_dict(
+                    "index"
+                ),
+                "last_updated": dt.datetime.now()
+                - dt.timedelta(seconds=time.monotonic() - max(self._last_loaded.values()))
+                if self._last_loaded
+                else None,
+            }
 
 
 # Load configuration and initialize DataManager
@@ -401,6 +734,3 @@ portfolio_manager = PortfolioManager(
     api_secret=config["binance"]["api_secret".upper()],
     saved_data=False,
 )
-asyncio.run(portfolio_manager.update_all_symbols_async(update_data = True))
-portfolio_manager.gen_combine_ohlc()
-portfolio_manager.gen_portfolio_performance()
@@ -2,33 +2,42 @@ import dash
 from dash import html, dcc, dash_table, callback, ctx
 from dash.dependencies import Input, Output, State
 import dash_bootstrap_components as dbc
-from src.util import dollar_format
+from src.util import dollar_format, dollar_format_list
+from src.logger import dash_logger
 from data.datamanagement import portfolio_manager
 from typing import Tuple, List, Dict, Any
 import plotly.graph_objects as go
-import asyncio
-
-portfolio_manager.gen_portfolio_performance()
 
 def update_portfolio_display() -> Tuple[List[Dict[str, Any]], go.Figure, go.Figure]:
     """Helper function to generate updated table and chart data"""
+    # Read every symbol's attributes at once and format each column in one pass
+    meta = portfolio_manager.get_meta()
+    symbols = meta.index.tolist()
+    # Cached until a portfolio change invalidates it
+    portfolio_performance = portfolio_manager.get_portfolio_performance()
     data_table = [
         {
             "symbol": symbol,
-            "units": portfolio_manager.get_symbol_element(symbol, "units"),
-            "price": dollar_format(portfolio_manager.get_symbol_element(symbol, "close")),
-            "value": dollar_format(portfolio_manager.get_symbol_element(symbol, "value")),
-            "weight": dollar_format(portfolio_manager.get_symbol_element(symbol, "weight")),
+            "units": units,
+            "price": price,
+            "value": value,
+            "weight": weight,
         }
-        for symbol in portfolio_manager.get_symbol_list()
+        for symbol, units, price, value, weight in zip(
+            symbols,
+            meta["units"].tolist(),
+            dollar_format_list(meta["close"].tolist()),
+            dollar_format_list(meta["value"].tolist()),
+            dollar_format_list(meta["weight"].tolist()),
+        )
     ]
     
     pie_chart = go.Figure(
         data=[
             go.Pie(
-                labels=list(portfolio_manager.symbols.keys()),
-                values=[portfolio_manager.get_symbol_element(symbol, "weight") for symbol in portfolio_manager.symbols.keys()],
-                marker_colors = [portfolio_manager.get_symbol_element(symbol, "colour") for symbol in portfolio_manager.symbols.keys()]
+                labels=symbols,
+                values=meta["weight"].tolist(),
+                marker_colors = meta["colour"].tolist()
             )
         ]
     )
@@ -36,8 +45,8 @@ def update_portfolio_display() -> Tuple[List[Dict[str, Any]], go.Figure, go.Figu
     pp_chart = go.Figure(
         data = [
             go.Scatter(
-                x = portfolio_manager.portfolio_performance.opentime,
-                y = portfolio_manager.portfolio_performance.portfolio_value,
+                x = portfolio_performance.get("opentime"),
+                y = portfolio_performance.get("portfolio_value"),
                 mode = "lines",
             )
         ],
@@ -149,19 +158,17 @@ def manage_portfolio(n_clicks, data_previous, new_symbol, units, current_data) -
     triggered_id = ctx.triggered[0]['prop_id'].split('.')[0]
     
     if triggered_id == "add-symbol" and n_clicks > 0:
-        print(f"Adding: {new_symbol}")
+        dash_logger.debug("Adding symbol %s", new_symbol)
         portfolio_manager.add_symbol(new_symbol, units, "1h")
-        asyncio.run(portfolio_manager.update_all_symbols_async())
+        portfolio_manager.run_sync(portfolio_manager.update_stale_symbols_async())
     elif triggered_id == "crypto-assets-table" and data_previous is not None:
         for row in data_previous:
             if row not in current_data:
-                print(f"Removing: {row}")
+                dash_logger.debug("Removing symbol %s", row["symbol"])
                 portfolio_manager.remove_symbol(row["symbol"])
-                asyncio.run(portfolio_manager.update_all_symbols_async())
+                portfolio_manager.run_sync(portfolio_manager.update_stale_symbols_async())
     else:
         raise dash.exceptions.PreventUpdate()
-    portfolio_manager.gen_combine_ohlc()
-    portfolio_manager.gen_portfolio_performance()
 
     data_table, pie_chart, pp_chart = update_portfolio_display()
     portfolio_value = f"Portfolio value: {dollar_format(portfolio_manager.portfolio_value)}"
@@ -0,0 +1,40 @@
+import os
+import time
+import pandas as pd
+from pathlib import Path
+from typing import Optional
+
+CACHE_DIR = "cache"
+
+def cache_path(symbol: str, interval: str) -> str:
+    """Path of the cached klines for a symbol and interval"""
+    return os.path.join(CACHE_DIR, f"{symbol}_{interval}.parquet")
+
+def age(symbol: str, interval: str) -> Optional[float]:
+    """Seconds since the cached klines were written, None if nothing is cached"""
+    path = cache_path(symbol, interval)
+    if not os.path.exists(path):
+        return None
+    return time.time() - os.path.getmtime(path)
+
+def read(path: str) -> pd.DataFrame:
+    """Read a Parquet file of klines with Arrow-backed dtypes"""
+    return pd.read_parquet(path, engine="pyarrow", dtype_backend="pyarrow")
+
+def write(path: str, df: pd.DataFrame) -> None:
+    """Write klines to a Parquet file, empty frames are not written"""
+    if df.empty:
+        return
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    df.to_parquet(path, engine="pyarrow", compression="zstd", index=False)
+
+def load(symbol: str, interval: str) -> pd.DataFrame:
+    """Load cached klines, an empty DataFrame if nothing is cached"""
+    path = cache_path(symbol, interval)
+    if not os.path.exists(path):
+        return pd.DataFrame()
+    return read(path)
+
+def store(symbol: str, interval: str, df: pd.DataFrame) -> None:
+    """Write klines to the cache, empty frames are not stored"""
+    write(cache_path(symbol, interval), df)
@@ -1,5 +1,7 @@
+import atexit
 import logging
 import logging.handlers
+import queue
 import sys
 from pathlib import Path
 from typing import Optional, Union
@@ -11,7 +13,7 @@ class Logger:
     
     Features:
     - Console and file logging
-    - Rotating file handlers
+    - Rotating file handlers, written from a background thread
     - Customizable formatting
     - Multiple log levels
     - Context managers for temporary log level changes
@@ -44,6 +46,7 @@ class Logger:
         """
         self.name = name
         self.logger = logging.getLogger(name)
+        self._listeners = []
         self.logger.setLevel(self._get_level(level))
         
         # Clear existing handlers to avoid duplicates
@@ -76,7 +79,7 @@ class Logger:
         self.logger.addHandler(console_handler)
     
     def _setup_file_handler(self, log_file: str, max_size: int, backup_count: int):
-        """Set up rotating file handler."""
+        """Set up rotating file handler, fed through a queue so callers never block on disk I/O."""
         # Create directory if it doesn't exist
         Path(log_file).parent.mkdir(parents=True, exist_ok=True)
         
@@ -86,7 +89,14 @@ class Logger:
             backupCount=backup_count
         )
         file_handler.setFormatter(self.formatter)
-        self.logger.addHandler(file_handler)
+        
+        log_queue = queue.Queue(-1)
+        self.logger.addHandler(logging.handlers.QueueHandler(log_queue))
+        listener = logging.handlers.QueueListener(log_queue, file_handler)
+        listener.start()
+        # Flush queued records on interpreter exit
+        atexit.register(listener.stop)
+        self._listeners.append(listener)
     
     def debug(self, message: str, *args, **kwargs):
         """Log debug message."""
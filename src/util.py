@@ -1,12 +1,17 @@
 import json
 import datetime as dt
+import copy
+import functools
+from typing import Iterable, List
 
-def parse_json(file_path : str) -> dict:
+@functools.lru_cache(maxsize=32)
+def _load_json(file_path : str) -> dict:
     with open(file_path, "r") as f:
-        data = json.load(f)
-    if f:
-        f.close()
-    return data
+        return json.load(f)
+
+def parse_json(file_path : str) -> dict:
+    # Each caller gets its own copy, so edits never leak into the cached parse
+    return copy.deepcopy(_load_json(file_path))
 
 def dt_date_range(start: dt.datetime, interval: int, periods: int):
     for i in range(1,periods+1):
@@ -17,3 +22,6 @@ def dollar_format(x: int | float):
         return f"-${abs(x):,.2f}"
     else:
         return f"${x:,.2f}"
+
+def dollar_format_list(values: Iterable[int | float]) -> List[str]:
+    return [dollar_format(x) for x in values]